@@ -0,0 +1,174 @@
+"""
+Async TheOne Trading API Client for Python
+"""
+
+from typing import Optional, Dict, Any, List
+import aiohttp
+from broker_client import BaseBrokerClient, Balance, BalancesResponse
+
+
+class AsyncBrokerClient(BaseBrokerClient):
+    """
+    Asyncio client for TheOne Trading API
+
+    Shares one event loop with BrokerWSClient, so independent REST calls can be
+    overlapped with asyncio.gather() over a single keep-alive session.
+    """
+
+    def __init__(self, api_key: str, secret_key: str, base_url: str):
+        """
+        Initialize API client
+
+        Args:
+            api_key: API key
+            secret_key: Secret key
+            base_url: Base API URL
+        """
+        super().__init__(api_key, secret_key, base_url)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create HTTP session lazily, since it must be bound to a running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.static_headers(),
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=64)
+            )
+        return self._session
+
+    async def make_request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                           additional_headers: Optional[Dict[str, str]] = None,
+                           response_type: Optional[type] = None) -> Any:
+        """
+        Make authenticated request to API
+
+        Args:
+            method: HTTP method
+            path: API path
+            body: Request body
+            additional_headers: Additional headers
+            response_type: msgspec.Struct type to decode the response into (optional)
+
+        Returns:
+            API response as dictionary, or as response_type if given
+
+        Raises:
+            APIError: API error
+            aiohttp.ClientError: Network error
+        """
+        headers, body_bytes = self._prepare_request(method, path, body, additional_headers)
+
+        url = self.base_url + path
+
+        async with self._get_session().request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=body_bytes if body_bytes else None
+        ) as response:
+            response.raise_for_status()
+            content = await response.read()
+
+        return self._parse_response(content, response_type)
+
+    async def get_balances(self) -> List[Balance]:
+        """
+        Get user balances
+
+        Returns:
+            List of asset balances
+        """
+        response = await self.make_request('GET', '/api/v1/balances', response_type=BalancesResponse)
+        return response.balances
+
+    async def estimate_swap(self, from_asset: str, to_asset: str, amount: str,
+                            network: Optional[str] = None, account: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get swap estimation
+
+        Args:
+            from_asset: Source asset
+            to_asset: Target asset
+            amount: Amount
+            network: Network (optional)
+            account: Account (optional)
+
+        Returns:
+            Estimation data
+        """
+        request_data = {
+            'from': from_asset,
+            'to': to_asset,
+            'amount': amount
+        }
+
+        if network:
+            request_data['network'] = network
+        if account:
+            request_data['account'] = account
+
+        return await self.make_request('POST', '/api/v1/estimate', request_data)
+
+    async def swap(self, from_asset: str, to_asset: str, amount: str, account: str,
+                   slippage_bps: int, idempotency_key: str, client_order_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute swap
+
+        Args:
+            from_asset: Source asset
+            to_asset: Target asset
+            amount: Amount
+            account: Account
+            slippage_bps: Slippage in basis points
+            idempotency_key: Idempotency key
+            client_order_id: Client order ID (optional)
+
+        Returns:
+            Created swap data
+        """
+        request_data = {
+            'from': from_asset,
+            'to': to_asset,
+            'amount': amount,
+            'account': account,
+            'slippage_bps': slippage_bps
+        }
+
+        if client_order_id:
+            request_data['clientOrderId'] = client_order_id
+
+        headers = {'Idempotency-Key': idempotency_key}
+
+        return await self.make_request('POST', '/api/v1/swap', request_data, headers)
+
+    async def get_order_status(self, order_id: str, client_order_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get order status
+
+        Args:
+            order_id: Order ID
+            client_order_id: Client order ID (optional)
+
+        Returns:
+            Order status
+        """
+        path = f'/api/v1/orders/{order_id}/status'
+        if client_order_id:
+            path += f'?clientOrderId={client_order_id}'
+
+        return await self.make_request('GET', path)
+
+    async def close(self):
+        """Close HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
@@ -4,12 +4,42 @@ TheOne Trading API Client for Python
 
 import hashlib
 import hmac
-import json
+import logging
 import time
-import random
+import secrets
 import base64
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+import msgspec
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# SHA256 of an empty body, used by GET requests
+EMPTY_SHA256_HEX = hashlib.sha256(b"").hexdigest()
+
+# Transient gateway errors, retried for idempotent requests
+RETRY_STATUSES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+@lru_cache(maxsize=None)
+def _get_decoder(response_type: type) -> msgspec.json.Decoder:
+    """Build msgspec decoder for a typed response, once per type"""
+    return msgspec.json.Decoder(response_type)
+
+
+def _canonical_bytes(method: str, path_with_query: str, timestamp: int, nonce: str, body_sha256: str) -> bytes:
+    """Build the canonical request string that is signed"""
+    return b"%s\n%s\n%d\n%s\n%s" % (
+        method.upper().encode('utf-8'),
+        path_with_query.encode('utf-8'),
+        timestamp,
+        nonce.encode('utf-8'),
+        body_sha256.encode('utf-8')
+    )
 
 
 class APIError(Exception):
@@ -21,33 +51,40 @@ class APIError(Exception):
         self.request_id = request_id
 
 
-class Balance:
+class Balance(msgspec.Struct):
     """Asset balance"""
-    def __init__(self, asset: str, total: str, locked: str):
-        self.asset = asset
-        self.total = total
-        self.locked = locked
-
-    def __repr__(self):
-        return f"Balance(asset='{self.asset}', total='{self.total}', locked='{self.locked}')"
+    asset: str
+    total: str
+    locked: str
 
 
-class RouteStep:
+class RouteStep(msgspec.Struct):
     """Swap route step"""
-    def __init__(self, exchange: str, pool: str, from_asset: str, to_asset: str, amount_in: str, amount_out: str):
-        self.exchange = exchange
-        self.pool = pool
-        self.from_asset = from_asset
-        self.to_asset = to_asset
-        self.amount_in = amount_in
-        self.amount_out = amount_out
+    exchange: str
+    pool: str
+    from_asset: str
+    to_asset: str
+    amount_in: str
+    amount_out: str
 
     def __repr__(self):
         return f"RouteStep(exchange='{self.exchange}', from_asset='{self.from_asset}', to_asset='{self.to_asset}')"
 
 
-class BrokerClient:
-    """Client for TheOne Trading API"""
+class APIResponse(msgspec.Struct):
+    """Base of typed responses; carries the error fields, since unknown fields are ignored"""
+    code: Optional[str] = None
+    message: Optional[str] = None
+    requestId: str = ""
+
+
+class BalancesResponse(APIResponse):
+    """Response of GET /api/v1/balances"""
+    balances: List[Balance] = []
+
+
+class BaseBrokerClient:
+    """Request signing and response parsing shared by the sync and async clients"""
 
     def __init__(self, api_key: str, secret_key: str, base_url: str):
         """
@@ -61,20 +98,18 @@ class BrokerClient:
         self.api_key = api_key
         self.secret_key = secret_key
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.timeout = 30
+        # HMAC key is the base64url-encoded SHA256 of the secret key
+        self._hmac_key = base64.urlsafe_b64encode(hashlib.sha256(secret_key.encode('utf-8')).digest())
 
     def generate_nonce(self) -> str:
         """Generate unique nonce"""
-        timestamp_ns = int(time.time() * 1_000_000_000)
-        random_part = random.randint(0, 999_999)
-        return f"{timestamp_ns}_{random_part}"
+        return f"{time.time_ns()}_{secrets.randbits(20)}"
 
-    def hash_body(self, body: str) -> str:
-        """Calculate SHA256 hash of request body"""
+    def hash_body(self, body: bytes) -> str:
+        """Calculate SHA256 hash of serialized request body"""
         if not body:
-            body = ""
-        return hashlib.sha256(body.encode('utf-8')).hexdigest()
+            return EMPTY_SHA256_HEX
+        return hashlib.sha256(body).hexdigest()
 
     def generate_signature(self, method: str, path_with_query: str, timestamp: int, nonce: str, body_sha256: str) -> str:
         """
@@ -90,43 +125,48 @@ class BrokerClient:
         Returns:
             HMAC-SHA256 signature in hex format
         """
-        canonical_string = "\n".join([
-            method.upper(),
-            path_with_query,
-            str(timestamp),
-            nonce,
-            body_sha256
-        ])
-
-        # Debug information
-        print("Creating signature:")
-        print(f"Method: {method.upper()}")
-        print(f"Path: {path_with_query}")
-        print(f"Timestamp: {timestamp}")
-        print(f"Nonce: {nonce}")
-        print(f"BodySHA256: {body_sha256}")
-        print(f"CanonicalString: {repr(canonical_string)}")
-
-        # Hash secret key and encode in base64url
-        secret_key_hash = hashlib.sha256(self.secret_key.encode('utf-8')).digest()
-        secret_key_base64 = base64.urlsafe_b64encode(secret_key_hash).decode('utf-8')
-        
-        # Create HMAC signature
-        signature = hmac.new(
-            secret_key_base64.encode('utf-8'),
-            canonical_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        canonical_bytes = _canonical_bytes(method, path_with_query, timestamp, nonce, body_sha256)
 
-        print(f"Signature: {signature}")
-        print("---")
+        # Create HMAC signature (single-shot, computed entirely in OpenSSL)
+        signature = hmac.digest(self._hmac_key, canonical_bytes, 'sha256').hex()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Created signature: canonical=%r sig=%s", canonical_bytes, signature)
 
         return signature
 
-    def make_request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, 
-                     additional_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    def sign_batch(self, requests_to_sign: List[Tuple[str, str, int, str, bytes]]) -> List[str]:
         """
-        Make authenticated request to API
+        Generate HMAC-SHA256 signatures for many requests at once (e.g. bulk pre-signing)
+
+        Args:
+            requests_to_sign: (method, path_with_query, timestamp, nonce, body) tuples,
+                where body is the serialized request body
+
+        Returns:
+            HMAC-SHA256 signatures in hex format, in input order
+        """
+        # Bind lookups once instead of resolving them for every item
+        key = self._hmac_key
+        digest = hmac.digest
+        canonical = _canonical_bytes
+        hash_body = self.hash_body
+        return [
+            digest(key, canonical(method, path_with_query, timestamp, nonce, hash_body(body)), 'sha256').hex()
+            for method, path_with_query, timestamp, nonce, body in requests_to_sign
+        ]
+
+    def static_headers(self) -> Dict[str, str]:
+        """Headers that are identical for every request of this client"""
+        return {
+            'Content-Type': 'application/json',
+            'X-API-KEY': self.api_key,
+        }
+
+    def _prepare_request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                         additional_headers: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, str], bytes]:
+        """
+        Serialize request body and build authentication headers
 
         Args:
             method: HTTP method
@@ -135,23 +175,19 @@ class BrokerClient:
             additional_headers: Additional headers
 
         Returns:
-            API response as dictionary
-
-        Raises:
-            APIError: API error
-            requests.RequestException: Network error
+            Per-request headers and serialized body
         """
-        timestamp = int(time.time() * 1000)  # milliseconds
+        timestamp = time.time_ns() // 1_000_000  # milliseconds
         nonce = self.generate_nonce()
         
-        body_string = json.dumps(body, separators=(',', ':')) if body else ""
-        body_sha256 = self.hash_body(body_string)
+        body_bytes = orjson.dumps(body) if body else b""
+        body_sha256 = self.hash_body(body_bytes)
 
         signature = self.generate_signature(method, path, timestamp, nonce, body_sha256)
 
+        # Content-Type and X-API-KEY are static and set once on the session
+        # (see static_headers), so only per-request headers are built here
         headers = {
-            'Content-Type': 'application/json',
-            'X-API-KEY': self.api_key,
             'X-API-TIMESTAMP': str(timestamp),
             'X-API-NONCE': nonce,
             'X-API-SIGN': signature,
@@ -160,22 +196,39 @@ class BrokerClient:
         if additional_headers:
             headers.update(additional_headers)
 
-        url = self.base_url + path
-        
-        response = self.session.request(
-            method=method,
-            url=url,
-            headers=headers,
-            data=body_string if body_string else None
-        )
+        return headers, body_bytes
 
-        response.raise_for_status()
+    def _parse_response(self, content: bytes, response_type: Optional[type] = None) -> Any:
+        """
+        Parse response body
+
+        Args:
+            content: Raw response body
+            response_type: msgspec.Struct type to decode into (optional)
+
+        Returns:
+            API response as dictionary, or as response_type if given
+
+        Raises:
+            APIError: API error
+        """
+        if response_type is not None:
+            try:
+                result = _get_decoder(response_type).decode(content)
+            except msgspec.DecodeError:
+                # Not the expected shape, so check whether it is an API error
+                self._parse_response(content)
+                raise APIError("PARSE_ERROR", f"Unexpected response: {content.decode('utf-8', 'replace')}")
+
+            # An error body can decode cleanly when all response fields have defaults
+            if isinstance(result, APIResponse) and result.code is not None and result.message is not None:
+                raise APIError(code=result.code, message=result.message, request_id=result.requestId)
+            return result
 
-        # Parse response
         try:
-            response_data = response.json()
-        except json.JSONDecodeError:
-            raise APIError("PARSE_ERROR", f"Failed to parse response: {response.text}")
+            response_data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            raise APIError("PARSE_ERROR", f"Failed to parse response: {content.decode('utf-8', 'replace')}")
 
         # Check if response is an API error
         if isinstance(response_data, dict) and 'code' in response_data and 'message' in response_data:
@@ -187,6 +240,84 @@ class BrokerClient:
 
         return response_data
 
+
+class BrokerClient(BaseBrokerClient):
+    """Client for TheOne Trading API"""
+
+    def __init__(self, api_key: str, secret_key: str, base_url: str):
+        """
+        Initialize API client
+
+        Args:
+            api_key: API key
+            secret_key: Secret key
+            base_url: Base API URL
+        """
+        super().__init__(api_key, secret_key, base_url)
+        self.session = requests.Session()
+        # requests.Session has no default timeout, so it is passed on every call
+        self.timeout = (5, 30)  # (connect, read) seconds
+        self.session.headers.update(self.static_headers())
+
+        # Keep more connections alive for bursty traffic
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Idempotent requests are retried on transient errors (see make_request)
+        self.max_retries = 3
+        self.retry_backoff = 0.2  # seconds, doubled on each retry
+
+    def make_request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, 
+                     additional_headers: Optional[Dict[str, str]] = None,
+                     response_type: Optional[type] = None) -> Any:
+        """
+        Make authenticated request to API
+
+        Args:
+            method: HTTP method
+            path: API path
+            body: Request body
+            additional_headers: Additional headers
+            response_type: msgspec.Struct type to decode the response into (optional)
+
+        Returns:
+            API response as dictionary, or as response_type if given
+
+        Raises:
+            APIError: API error
+            requests.RequestException: Network error
+        """
+        url = self.base_url + path
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+
+        while True:
+            # Sign every attempt: the server rejects a nonce it has already seen
+            headers, body_bytes = self._prepare_request(method, path, body, additional_headers)
+
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    data=body_bytes if body_bytes else None,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                if not retryable or attempt >= self.max_retries or response.status_code not in RETRY_STATUSES:
+                    break
+
+            time.sleep(self.retry_backoff * (2 ** attempt))
+            attempt += 1
+
+        response.raise_for_status()
+
+        return self._parse_response(response.content, response_type)
+
     def get_balances(self) -> List[Balance]:
         """
         Get user balances
@@ -194,13 +325,8 @@ class BrokerClient:
         Returns:
             List of asset balances
         """
-        response = self.make_request('GET', '/api/v1/balances')
-        balances_data = response.get('balances', [])
-        return [Balance(
-            asset=b['asset'],
-            total=b['total'],
-            locked=b['locked']
-        ) for b in balances_data]
+        response = self.make_request('GET', '/api/v1/balances', response_type=BalancesResponse)
+        return response.balances
 
     def estimate_swap(self, from_asset: str, to_asset: str, amount: str, 
                       network: Optional[str] = None, account: Optional[str] = None) -> Dict[str, Any]:
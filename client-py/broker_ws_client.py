@@ -3,17 +3,38 @@ WebSocket Client for TheOne Trading API
 """
 
 import asyncio
-import json
 import hashlib
 import hmac
 import time
 import random
+import secrets
 import base64
+from functools import lru_cache
 from typing import Optional, Callable, Dict, Any, List
 import logging
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
+# SHA256 of an empty body, used by auth and data-less signed messages
+EMPTY_SHA256_HEX = hashlib.sha256(b'').hexdigest()
+
+# Control frame templates; the channel is filled in as a JSON-encoded string
+SUBSCRIBE_FRAME = '{"op":"subscribe","ch":%s}'
+UNSUBSCRIBE_FRAME = '{"op":"unsubscribe","ch":%s}'
+
+
+@lru_cache(maxsize=512)
+def _subscribe_frame(channel: str) -> str:
+    """Serialized subscribe frame, cached for repeated subscriptions"""
+    return SUBSCRIBE_FRAME % orjson.dumps(channel).decode('utf-8')
+
+
+@lru_cache(maxsize=512)
+def _unsubscribe_frame(channel: str) -> str:
+    """Serialized unsubscribe frame, cached for repeated unsubscriptions"""
+    return UNSUBSCRIBE_FRAME % orjson.dumps(channel).decode('utf-8')
+
 
 class BrokerWSClient:
     """
@@ -34,14 +55,22 @@ class BrokerWSClient:
         self.api_key = api_key
         self.secret_key = secret_key
         self.ws_url = ws_url
+        # HMAC key is the base64url-encoded SHA256 of the secret key
+        self._hmac_key = base64.urlsafe_b64encode(hashlib.sha256(secret_key.encode('utf-8')).digest())
         self.websocket = None
         self.authenticated = False
+        # channel -> tuple of (handler, is_coroutine_function) pairs
         self.subscriptions = {}
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
         self.reconnect_delay = 1.0
+        self.max_reconnect_delay = 30.0
+        self.reconnect_jitter = 0.5
         self.running = False
         self.response_handler = None
+        self._auth_event = None
+        self._auth_error = None
+        self._reader_task = None
         
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -54,9 +83,7 @@ class BrokerWSClient:
 
     def generate_nonce(self) -> str:
         """Generate unique nonce"""
-        timestamp_ns = int(time.time() * 1_000_000_000)
-        random_part = random.randint(0, 999_999)
-        return f"{timestamp_ns}_{random_part}"
+        return f"{time.time_ns()}_{secrets.randbits(20)}"
 
     def generate_signature(self, timestamp: int, nonce: str, operation: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -77,23 +104,21 @@ class BrokerWSClient:
         path_with_query = f"/ws/v1/{operation}" if operation else "/ws/v1/stream"
         
         # Calculate body hash
-        body_bytes = b''
         if data is not None:
-            body_bytes = json.dumps(data, separators=(',', ':')).encode('utf-8')
-        body_sha256 = hashlib.sha256(body_bytes).hexdigest()
-        
-        canonical_string = "\n".join([method, path_with_query, str(timestamp), nonce, body_sha256])
-        
-        # Hash secret key and encode in base64url
-        secret_key_hash = hashlib.sha256(self.secret_key.encode('utf-8')).digest()
-        secret_key_base64 = base64.urlsafe_b64encode(secret_key_hash).decode('utf-8')
+            body_sha256 = hashlib.sha256(orjson.dumps(data)).hexdigest()
+        else:
+            body_sha256 = EMPTY_SHA256_HEX
+        
+        canonical_bytes = b"%s\n%s\n%d\n%s\n%s" % (
+            method.encode('utf-8'),
+            path_with_query.encode('utf-8'),
+            timestamp,
+            nonce.encode('utf-8'),
+            body_sha256.encode('utf-8')
+        )
         
-        # Create HMAC signature
-        signature = hmac.new(
-            secret_key_base64.encode('utf-8'),
-            canonical_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        # Create HMAC signature (single-shot, computed entirely in OpenSSL)
+        signature = hmac.digest(self._hmac_key, canonical_bytes, 'sha256').hex()
         
         return signature
 
@@ -108,7 +133,7 @@ class BrokerWSClient:
         Returns:
             Signed message dictionary
         """
-        timestamp = int(time.time() * 1000)  # milliseconds
+        timestamp = time.time_ns() // 1_000_000  # milliseconds
         nonce = self.generate_nonce()
         signature = self.generate_signature(timestamp, nonce, operation, data)
         
@@ -131,9 +156,13 @@ class BrokerWSClient:
             self.websocket = await websockets.connect(self.ws_url)
             self.logger.info("WebSocket connected successfully")
             
+            # Reset authentication state before the handler can see a response
+            self._auth_event = asyncio.Event()
+            self._auth_error = None
+            
             # Start message handler
             self.running = True
-            asyncio.create_task(self._message_handler())
+            self._reader_task = asyncio.create_task(self._message_handler())
             
             # Authenticate
             await self._authenticate()
@@ -142,11 +171,14 @@ class BrokerWSClient:
             
         except Exception as e:
             self.logger.error(f"Failed to connect: {e}")
+            # Don't leave the reader and socket of the failed attempt behind
+            self.authenticated = False
+            await self._close_connection()
             raise
 
     async def _authenticate(self):
         """Send authentication message"""
-        timestamp = int(time.time() * 1000)  # milliseconds
+        timestamp = time.time_ns() // 1_000_000  # milliseconds
         nonce = self.generate_nonce()
         signature = self.generate_signature(timestamp, nonce)
         
@@ -163,13 +195,13 @@ class BrokerWSClient:
         
         # Wait for authentication response
         auth_timeout = 10.0
-        start_time = time.time()
-        
-        while not self.authenticated and (time.time() - start_time) < auth_timeout:
-            await asyncio.sleep(0.1)
+        try:
+            await asyncio.wait_for(self._auth_event.wait(), timeout=auth_timeout)
+        except asyncio.TimeoutError:
+            raise Exception("Authentication timeout")
             
         if not self.authenticated:
-            raise Exception("Authentication timeout")
+            raise Exception(f"Authentication failed: {self._auth_error}")
 
     async def subscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]):
         """
@@ -182,60 +214,66 @@ class BrokerWSClient:
         if not self.authenticated:
             raise Exception("Not authenticated")
             
-        # Store handler
-        if channel not in self.subscriptions:
-            self.subscriptions[channel] = []
-        self.subscriptions[channel].append(handler)
-        
-        subscribe_message = {
-            'op': 'subscribe',
-            'ch': channel
-        }
+        # Store handler, resolving once whether it has to be awaited. The tuple
+        # is replaced rather than mutated, so a dispatch already iterating the
+        # old one is unaffected.
+        entry = (handler, asyncio.iscoroutinefunction(handler))
+        self.subscriptions[channel] = (*self.subscriptions.get(channel, ()), entry)
         
-        await self._send_message(subscribe_message)
+        await self._send_frame(_subscribe_frame(channel))
         self.logger.info(f"Subscription request sent for channel: {channel}")
 
-    async def unsubscribe(self, channel: str):
+    async def unsubscribe(self, channel: str, handler: Optional[Callable[[Dict[str, Any]], None]] = None):
         """
         Unsubscribe from a channel
         
         Args:
             channel: Channel name to unsubscribe from
+            handler: Remove only this handler (optional); the channel is
+                unsubscribed once no handlers remain
         """
         if not self.authenticated:
             raise Exception("Not authenticated")
             
-        # Remove handlers
-        if channel in self.subscriptions:
-            del self.subscriptions[channel]
-        
-        unsubscribe_message = {
-            'op': 'unsubscribe',
-            'ch': channel
-        }
-        
-        await self._send_message(unsubscribe_message)
+        # Remove handlers. The tuple is replaced rather than mutated, so a
+        # dispatch already iterating the old one is unaffected.
+        if handler is not None:
+            remaining = tuple(entry for entry in self.subscriptions.get(channel, ()) if entry[0] is not handler)
+            if remaining:
+                self.subscriptions[channel] = remaining
+                return
+        self.subscriptions.pop(channel, None)
+        
+        await self._send_frame(_unsubscribe_frame(channel))
         self.logger.info(f"Unsubscribe request sent for channel: {channel}")
 
     async def _send_message(self, message: Dict[str, Any]):
         """Send message to WebSocket"""
+        # Decode to str so the frame goes out as text, as the server expects
+        await self._send_frame(orjson.dumps(message).decode('utf-8'))
+
+    async def _send_frame(self, frame: str):
+        """Send already serialized JSON frame to WebSocket"""
         if not self.websocket:
             raise Exception("WebSocket not connected")
             
-        message_json = json.dumps(message, separators=(',', ':'))
-        await self.websocket.send(message_json)
+        await self.websocket.send(frame)
 
     async def _message_handler(self):
         """Handle incoming WebSocket messages"""
+        # Bind hot-loop lookups to locals once per connection
+        loads = orjson.loads
+        decode_error = orjson.JSONDecodeError
+        handle = self._handle_message
+        log_error = self.logger.error
         try:
             async for message in self.websocket:
                 try:
-                    data = json.loads(message)
-                    await self._handle_message(data)
-                except json.JSONDecodeError:
-                    self.logger.error(f"Failed to parse message: {message}")
+                    await handle(loads(message))
+                except decode_error:
+                    log_error(f"Failed to parse message: {message}")
                 except Exception as e:
-                    self.logger.error(f"Error handling message: {e}")
+                    log_error(f"Error handling message: {e}")
                     
         except ConnectionClosed:
             self.logger.warning("WebSocket connection closed")
@@ -250,9 +288,31 @@ class BrokerWSClient:
 
     async def _handle_message(self, data: Dict[str, Any]):
         """Process individual message"""
+        # Fast path: data messages for a subscribed channel
+        channel = data.get('ch')
+        if channel is not None and 'op' not in data and not data.get('error'):
+            self.logger.debug("Received data for channel: %s", channel)
+            
+            # Call all handlers for this channel
+            for handler, is_coro in self.subscriptions.get(channel, ()):
+                try:
+                    if is_coro:
+                        await handler(data)
+                    else:
+                        handler(data)
+                except Exception as e:
+                    self.logger.error(f"Error in message handler: {e}")
+            return
+            
         # Handle error messages
         if 'error' in data and data['error']:
             self.logger.error(f"WebSocket message error: {data['error']}")
+            # Until authenticated, an error frame (documented without 'op') is the
+            # auth failure; wake up _authenticate instead of letting it time out
+            if (not self.authenticated and self._auth_event is not None
+                    and not self._auth_event.is_set()):
+                self._auth_error = data['error']
+                self._auth_event.set()
             return
             
         # Handle response messages (auth, subscribe, unsubscribe)
@@ -266,6 +326,8 @@ class BrokerWSClient:
                 else:
                     self.authenticated = True
                     self.logger.info("Authentication successful")
+                    if self._auth_event is not None:
+                        self._auth_event.set()
                     
             elif op == 'subscribe':
                 channel = data.get('ch', '')
@@ -292,62 +354,60 @@ class BrokerWSClient:
                 except Exception as e:
                     self.logger.error(f"Error in response handler: {e}")
             return
-            
-        # Handle data messages
-        if 'ch' in data:
-            channel = data['ch']
-            self.logger.debug(f"Received data for channel: {channel}")
-            
-            # Call all handlers for this channel
-            if channel in self.subscriptions:
-                for handler in self.subscriptions[channel]:
-                    try:
-                        if asyncio.iscoroutinefunction(handler):
-                            await handler(data)
-                        else:
-                            handler(data)
-                    except Exception as e:
-                        self.logger.error(f"Error in message handler: {e}")
 
     async def _handle_reconnect(self):
-        """Handle reconnection with exponential backoff"""
-        if self.reconnect_attempts >= self.max_reconnect_attempts:
-            self.logger.error("Max reconnection attempts reached")
-            return
+        """Handle reconnection with capped, jittered exponential backoff"""
+        while self.running and self.reconnect_attempts < self.max_reconnect_attempts:
+            # Jitter keeps many clients from reconnecting in lockstep
+            delay = min(self.max_reconnect_delay, self.reconnect_delay * (2 ** self.reconnect_attempts))
+            delay += random.uniform(0, self.reconnect_jitter)
+            self.reconnect_attempts += 1
             
-        self.reconnect_attempts += 1
-        delay = self.reconnect_delay * (2 ** (self.reconnect_attempts - 1))
-        
-        self.logger.info(f"Attempting to reconnect in {delay}s (attempt {self.reconnect_attempts}/{self.max_reconnect_attempts})")
-        
-        await asyncio.sleep(delay)
-        
-        try:
-            await self.connect()
+            self.logger.info(f"Attempting to reconnect in {delay:.2f}s (attempt {self.reconnect_attempts}/{self.max_reconnect_attempts})")
             
-            # Re-subscribe to all channels
-            channels_to_resubscribe = list(self.subscriptions.keys())
-            for channel in channels_to_resubscribe:
-                handlers = self.subscriptions[channel].copy()
-                # Clear and re-subscribe
-                self.subscriptions[channel] = []
-                for handler in handlers:
-                    await self.subscribe(channel, handler)
-                    
-        except Exception as e:
-            self.logger.error(f"Reconnection failed: {e}")
-            await self._handle_reconnect()
+            await asyncio.sleep(delay)
+            
+            try:
+                await self.connect()
+                
+                # Re-subscribe to all channels
+                channels_to_resubscribe = list(self.subscriptions.keys())
+                for channel in channels_to_resubscribe:
+                    entries = self.subscriptions[channel]
+                    # Clear and re-subscribe
+                    self.subscriptions[channel] = ()
+                    for handler, _ in entries:
+                        await self.subscribe(channel, handler)
+                return
+                        
+            except Exception as e:
+                self.logger.error(f"Reconnection failed: {e}")
+        
+        if self.running:
+            self.logger.error("Max reconnection attempts reached")
 
     async def close(self):
         """Close WebSocket connection"""
         self.running = False
         self.authenticated = False
         self.subscriptions.clear()
-        
-        if self.websocket:
+        await self._close_connection()
+
+    async def _close_connection(self):
+        """Stop the reader task and close the socket of the current connection"""
+        # Stop the reader unless this runs in one of its handlers
+        reader_task, self._reader_task = self._reader_task, None
+        if reader_task is not None and reader_task is not asyncio.current_task():
+            reader_task.cancel()
+            try:
+                await reader_task
+            except asyncio.CancelledError:
+                pass
+        
+        websocket, self.websocket = self.websocket, None
+        if websocket:
             self.logger.info("Closing WebSocket connection")
-            await self.websocket.close()
-            self.websocket = None
+            await websocket.close()
 
     def is_connected(self) -> bool:
         """Check if WebSocket is connected and authenticated"""
@@ -3,16 +3,228 @@
 Example of using TheOne Trading API Python client
 """
 
+import asyncio
+import logging
 import os
+import secrets
+import signal
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from broker_client import BrokerClient, APIError
+from example_common import get_ws_client, poll_delay, ws_client_pool, ws_url_from_base
 
 # Load environment variables from .env file
 load_dotenv()
 
+log = logging.getLogger("example")
+
+# How long to wait for a fill pushed over the WebSocket order channel
+ORDER_FILL_TIMEOUT = 30
+
+# Order statuses after which there is nothing left to wait for
+FILLED_STATUSES = frozenset({'FILLED', 'PARTIAL_FILLED'})
+FINAL_STATUSES = FILLED_STATUSES | {'FAILED', 'CANCELLED'}
+
+# Cached quotes: (from_asset, to_asset, amount) -> (estimate, expiry in seconds).
+# Quotes are dropped this many seconds before the server-side expiresAt.
+_estimate_cache = {}
+ESTIMATE_SAFETY_MARGIN = 1.0
+
+
+def cached_estimate(client, from_asset, to_asset, amount):
+    """
+    Get swap estimation, reusing a previous quote until it is about to expire
+
+    Args:
+        client: REST API client
+        from_asset: Source asset
+        to_asset: Target asset
+        amount: Amount
+
+    Returns:
+        Estimation data
+    """
+    key = (from_asset, to_asset, amount)
+    cached = _estimate_cache.get(key)
+    if cached is not None and time.time() < cached[1] - ESTIMATE_SAFETY_MARGIN:
+        return cached[0]
+
+    try:
+        estimate = client.estimate_swap(from_asset=from_asset, to_asset=to_asset, amount=amount)
+    except APIError:
+        # Don't keep serving a quote for a request the server now rejects
+        _estimate_cache.pop(key, None)
+        raise
+
+    expires_at = estimate.get('expiresAt')
+    if expires_at:
+        _estimate_cache[key] = (estimate, expires_at / 1000)  # expiresAt is in milliseconds
+    return estimate
+
+
+def print_order_status(order_status):
+    """Print order status fields"""
+    print("Order status:")
+    print(f"  Order ID: {order_status.get('orderId', 'N/A')}")
+    print(f"  Status: {order_status.get('status', 'N/A')}")
+    print(f"  Filled Out: {order_status.get('filledOut', 'N/A')}")
+    print(f"  TX Hash: {order_status.get('txHash', 'N/A')}")
+    print(f"  Updated At: {order_status.get('updatedAt', 'N/A')}")
+
+
+async def wait_for_order_fill(client, api_key, secret_key, base_url, order_id):
+    """
+    Wait for the order to fill, fail or be cancelled using server-push updates
+    on its orders:{id} channel
+
+    Args:
+        client: REST API client, used for one status check once subscribed
+        api_key: API key
+        secret_key: Secret key
+        base_url: Base API URL
+        order_id: Order ID to watch
+
+    Returns:
+        Order data that reported a final status, or None if ORDER_FILL_TIMEOUT passed first
+
+    Raises:
+        Exception: WebSocket connection or subscription failed
+    """
+    ws_url = ws_url_from_base(base_url)
+    finished = asyncio.Event()
+    final = {}
+
+    def order_handler(message):
+        data = message.get('data') or {}
+        if str(data.get('status', '')).upper() in FINAL_STATUSES:
+            final.update(data)
+            finished.set()
+
+    async with ws_client_pool():
+        channel = f"orders:{order_id}"
+        ws_client = await get_ws_client(api_key, secret_key, ws_url, channel)
+        await ws_client.subscribe(channel, order_handler)
+
+        # The order may have finished before the subscription became active
+        try:
+            loop = asyncio.get_running_loop()
+            order_status = await loop.run_in_executor(None, client.get_order_status, order_id)
+            order_handler({'data': order_status})
+        except Exception as e:
+            print(f"Error getting order status: {e}")
+
+        try:
+            await asyncio.wait_for(finished.wait(), timeout=ORDER_FILL_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+
+    return final
+
+
+def poll_order_status(client, order_id):
+    """
+    Check order status cyclically (up to 5 attempts)
+
+    Args:
+        client: REST API client
+        order_id: Order ID to check
+    """
+    print("\n=== Checking Order Status ===")
+
+    # Ctrl+C cuts the wait between checks short instead of killing the loop
+    shutdown_event = threading.Event()
+    previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: shutdown_event.set())
+
+    max_attempts = 5
+    attempt = 0
+    order_status = None
+    final_status = None
+    status_upper = ''
+
+    try:
+        while attempt < max_attempts:
+            attempt += 1
+            log.info("Attempt %d/%d:", attempt, max_attempts)
+
+            try:
+                order_status = client.get_order_status(order_id)
+                log.info("Order %s status=%s filled=%s tx=%s updated=%s",
+                         order_status.get('orderId', 'N/A'), order_status.get('status', 'N/A'),
+                         order_status.get('filledOut', 'N/A'), order_status.get('txHash', 'N/A'),
+                         order_status.get('updatedAt', 'N/A'))
+
+                # Get the status from response
+                final_status = order_status.get('status', '')
+
+                # Check if the order reached a final status (case-insensitive)
+                status_upper = final_status.upper()
+                if status_upper in FINAL_STATUSES:
+                    mark = "✓" if status_upper in FILLED_STATUSES else "✗"
+                    print(f"\n{mark} Order {final_status}! Stopping status checks.")
+                    break
+
+                # If not final status and not last attempt, wait before next check
+                if attempt < max_attempts:
+                    delay = poll_delay(attempt)
+                    log.info("Status is '%s', waiting %ss before next check...", final_status, delay)
+                    if shutdown_event.wait(delay):
+                        print("Interrupted, stopping status checks.")
+                        break
+
+            except APIError as e:
+                log.error("Error getting order status: %s", e)
+
+                # If not last attempt, wait before retry
+                if attempt < max_attempts:
+                    delay = poll_delay(attempt, error=True)
+                    log.info("Waiting %ss before retry...", delay)
+                    if shutdown_event.wait(delay):
+                        print("Interrupted, stopping status checks.")
+                        break
+            except Exception as e:
+                log.error("Network error getting order status: %s", e)
+
+                # If not last attempt, wait before retry
+                if attempt < max_attempts:
+                    delay = poll_delay(attempt, error=True)
+                    log.info("Waiting %ss before retry...", delay)
+                    if shutdown_event.wait(delay):
+                        print("Interrupted, stopping status checks.")
+                        break
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+    # Summary after all attempts
+    if status_upper in FILLED_STATUSES:
+        print(f"\n✓ Order successfully {final_status} after {attempt} attempt(s).")
+    elif status_upper in FINAL_STATUSES:
+        print(f"\n✗ Order {final_status} after {attempt} attempt(s).")
+    elif attempt >= max_attempts:
+        print(f"\n⚠ Maximum attempts ({max_attempts}) reached. Final status: {final_status or 'unknown'}")
+
+
+def setup_logging():
+    """
+    Send the example's own log records to stdout; LOG_LEVEL=WARNING silences them
+
+    Only the "example" logger is configured: the WebSocket client installs its
+    own handler, so a root handler would print its records twice.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+    log.propagate = False
+
+    level = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+    log.setLevel(level if isinstance(level, int) else logging.INFO)
+
 
 def main():
+    setup_logging()
+
     # Load API keys from environment variables
     api_key = os.getenv('BROKER_API_KEY')
     secret_key = os.getenv('BROKER_SECRET_KEY')
@@ -26,11 +238,23 @@ def main():
     # Create API client
     client = BrokerClient(api_key, secret_key, base_url)
 
+    # Balances and estimate are independent, so request them concurrently
+    executor = ThreadPoolExecutor(max_workers=2)
+
     try:
+        balances_future = executor.submit(client.get_balances)
+        estimate_future = executor.submit(
+            cached_estimate,
+            client,
+            from_asset="USDT",
+            to_asset="XRP",
+            amount="10"
+        )
+
         # Example 1: Get balances
         print("=== Getting Balances ===")
         try:
-            balances = client.get_balances()
+            balances = balances_future.result()
             print(f"Balances received ({len(balances)} assets):")
             for balance in balances:
                 print(f"  {balance}")
@@ -43,11 +267,7 @@ def main():
         print("\n=== Estimating Swap ===")
         estimate = None
         try:
-            estimate = client.estimate_swap(
-                from_asset="USDT",
-                to_asset="XRP",
-                amount="10"
-            )
+            estimate = estimate_future.result()
             print("Estimate received:")
             print(f"  Price: {estimate.get('price', 'N/A')}")
             print(f"  Expected Out: {estimate.get('expectedOut', 'N/A')}")
@@ -66,7 +286,7 @@ def main():
         # Example 3: Execute swap (only if estimate exists)
         if estimate:
             print("\n=== Executing Swap ===")
-            idempotency_key = f"swap_{int(time.time() * 1000)}_{int(time.time() % 1000000)}"
+            idempotency_key = f"swap_{secrets.token_hex(8)}"
             
             try:
                 swap_response = client.swap(
@@ -81,63 +301,23 @@ def main():
                 print(f"  Order ID: {swap_response.get('orderId', 'N/A')}")
                 print(f"  Status: {swap_response.get('status', 'N/A')}")
 
-                # Example 4: Check order status cyclically (up to 5 attempts)
-                print("\n=== Checking Order Status ===")
-                
-                max_attempts = 5
-                attempt = 0
-                order_status = None
-                final_status = None
-                
-                while attempt < max_attempts:
-                    attempt += 1
-                    print(f"\nAttempt {attempt}/{max_attempts}:")
-                    
-                    try:
-                        order_status = client.get_order_status(swap_response['orderId'])
-                        print("Order status:")
-                        print(f"  Order ID: {order_status.get('orderId', 'N/A')}")
-                        print(f"  Status: {order_status.get('status', 'N/A')}")
-                        print(f"  Filled Out: {order_status.get('filledOut', 'N/A')}")
-                        print(f"  TX Hash: {order_status.get('txHash', 'N/A')}")
-                        print(f"  Updated At: {order_status.get('updatedAt', 'N/A')}")
-                        
-                        # Get the status from response
-                        final_status = order_status.get('status', '')
-                        
-                        # Check if status is filled or partial_filled (case-insensitive)
-                        status_upper = final_status.upper()
-                        if status_upper == 'FILLED' or status_upper == 'PARTIAL_FILLED':
-                            print(f"\n✓ Order {final_status}! Stopping status checks.")
-                            break
-                        
-                        # If not final status and not last attempt, wait before next check
-                        if attempt < max_attempts:
-                            print(f"Status is '{final_status}', waiting 2 seconds before next check...")
-                            time.sleep(2)
-                            
-                    except APIError as e:
-                        print(f"Error getting order status: {e}")
-                        
-                        # If not last attempt, wait before retry
-                        if attempt < max_attempts:
-                            print("Waiting 2 seconds before retry...")
-                            time.sleep(2)
-                    except Exception as e:
-                        print(f"Network error getting order status: {e}")
-                        
-                        # If not last attempt, wait before retry
-                        if attempt < max_attempts:
-                            print("Waiting 2 seconds before retry...")
-                            time.sleep(2)
-                
-                # Summary after all attempts
-                final_status_upper = final_status.upper() if final_status else ''
-                if attempt >= max_attempts and final_status_upper not in ['FILLED', 'PARTIAL_FILLED']:
-                    print(f"\n⚠ Maximum attempts ({max_attempts}) reached. Final status: {final_status or 'unknown'}")
-                elif final_status_upper in ['FILLED', 'PARTIAL_FILLED']:
-                    print(f"\n✓ Order successfully {final_status} after {attempt} attempt(s).")
-                    
+                # Example 4: Wait for the order to fill via WebSocket push updates
+                print("\n=== Waiting for Order Fill ===")
+                order_id = swap_response['orderId']
+                try:
+                    final = asyncio.run(wait_for_order_fill(client, api_key, secret_key, base_url, order_id))
+                except Exception as e:
+                    # No push channel available, so fall back to polling the REST API
+                    print(f"WebSocket unavailable ({e}), falling back to status polling")
+                    poll_order_status(client, order_id)
+                else:
+                    if final is None:
+                        print(f"\n⚠ Order not finished within {ORDER_FILL_TIMEOUT}s")
+                    else:
+                        print_order_status(final)
+                        mark = "✓" if str(final.get('status', '')).upper() in FILLED_STATUSES else "✗"
+                        print(f"\n{mark} Order {final.get('status')}!")
+
             except APIError as e:
                 print(f"Error executing swap: {e}")
             except Exception as e:
@@ -145,6 +325,8 @@ def main():
 
     except Exception as e:
         print(f"General error: {e}")
+    finally:
+        executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""
+Helpers shared by the REST and WebSocket examples
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit, urlunsplit
+from broker_ws_client import BrokerWSClient
+
+# Delays between order status checks in seconds: fast fills are seen quickly,
+# slow ones are not hammered
+POLL_DELAYS = (0.5, 1, 2, 4, 8)
+MAX_POLL_DELAY = 60
+
+
+def poll_delay(attempt, error=False):
+    """Delay before the next status check; failed checks back off twice as fast"""
+    delay = POLL_DELAYS[min(attempt, len(POLL_DELAYS)) - 1]
+    if error:
+        delay *= 2
+    return min(delay, MAX_POLL_DELAY)
+
+
+def ws_url_from_base(base_url):
+    """Convert HTTP API base URL to the WebSocket stream URL"""
+    parts = urlsplit(base_url)
+    scheme = 'wss' if parts.scheme in ('https', 'wss') else 'ws'
+    return urlunsplit((scheme, parts.netloc, parts.path.rstrip('/') + '/ws/v1/stream', '', ''))
+
+
+# Channels one pooled WebSocket connection carries before another is opened
+MAX_SYMBOLS_PER_WEBSOCKET = int(os.getenv('MAX_SYMBOLS_PER_WEBSOCKET', '100'))
+
+# Connected clients per (api_key, ws_url)
+_WS_POOL = {}
+
+
+def _has_room(ws_client, channel=None):
+    """Check whether the client can take the channel without exceeding the cap"""
+    return channel in ws_client.subscriptions or len(ws_client.subscriptions) < MAX_SYMBOLS_PER_WEBSOCKET
+
+
+def _is_dead(ws_client):
+    """Check whether the client was closed or gave up reconnecting"""
+    return not ws_client.running or (
+        not ws_client.authenticated and ws_client.reconnect_attempts >= ws_client.max_reconnect_attempts
+    )
+
+
+async def get_ws_client(api_key, secret_key, ws_url, channel=None):
+    """
+    Return a connected pooled client with room for another subscription
+
+    The connection (handshake and authentication) is reused until it carries
+    MAX_SYMBOLS_PER_WEBSOCKET channels, then another one is opened. A client
+    already subscribed to channel is preferred.
+    """
+    pool = _WS_POOL.setdefault((api_key, ws_url), [])
+    dead = [ws_client for ws_client in pool if _is_dead(ws_client)]
+    if dead:
+        pool[:] = [ws_client for ws_client in pool if ws_client not in dead]
+        await asyncio.gather(*(ws_client.close() for ws_client in dead), return_exceptions=True)
+
+    # Clients that are reconnecting stay pooled but are not handed out
+    ready = [ws_client for ws_client in pool if ws_client.authenticated]
+    for ws_client in ready:
+        if channel is not None and channel in ws_client.subscriptions:
+            return ws_client
+    for ws_client in ready:
+        if _has_room(ws_client):
+            return ws_client
+
+    ws_client = BrokerWSClient(api_key, secret_key, ws_url)
+    await ws_client.connect()
+    pool.append(ws_client)
+    return ws_client
+
+
+async def pooled_subscribe(ws_client, channel, handler):
+    """
+    Subscribe on ws_client, or on another client from its pool once ws_client
+    carries MAX_SYMBOLS_PER_WEBSOCKET channels
+
+    Returns:
+        Client that carries the subscription
+    """
+    if not _has_room(ws_client, channel):
+        ws_client = await get_ws_client(ws_client.api_key, ws_client.secret_key, ws_client.ws_url, channel)
+    await ws_client.subscribe(channel, handler)
+    return ws_client
+
+
+async def close_ws_clients():
+    """Close all pooled WebSocket clients"""
+    ws_clients = [ws_client for pool in _WS_POOL.values() for ws_client in pool]
+    _WS_POOL.clear()
+    await asyncio.gather(*(ws_client.close() for ws_client in ws_clients), return_exceptions=True)
+
+
+@asynccontextmanager
+async def ws_client_pool():
+    """Close the pooled WebSocket clients when the block exits"""
+    try:
+        yield
+    finally:
+        await close_ws_clients()
@@ -3,37 +3,93 @@ Example usage of WebSocket client for TheOne Trading API
 """
 
 import asyncio
-import json
+import atexit
 import logging
 import os
+import queue
 import signal
+import sys
+import time
+import orjson
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
-from broker_ws_client import BrokerWSClient
+from example_common import get_ws_client, poll_delay, pooled_subscribe, ws_client_pool, ws_url_from_base
 
 # Load environment variables from .env file
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Background tasks started from handlers; referenced here so they are not
+# garbage collected mid-await and can be cancelled on shutdown
+_bg = set()
+
+
+def emit(*parts):
+    """Write one message's output in a single call; flushing is left to flush_stdout()"""
+    sys.stdout.write("".join(parts))
+
+
+def emit_record(message):
+    """
+    Write a received message as one NDJSON line
+
+    The line holds the receive time in nanoseconds, the channel (or the
+    operation, for responses) and the message data.
+    """
+    record = {'ts': time.time_ns()}
+    if 'ch' in message:
+        record['ch'] = message['ch']
+    else:
+        record['op'] = message.get('op')
+    record['data'] = message.get('data')
+    emit(orjson.dumps(record).decode('utf-8'), "\n")
+
+
+async def flush_stdout(interval=0.1):
+    """Flush buffered output periodically rather than after every line"""
+    while True:
+        await asyncio.sleep(interval)
+        sys.stdout.flush()
+
 
 def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    """
+    Setup logging configuration
+
+    Records are queued and written by a listener thread, so handlers running
+    on the event loop never block on console output.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    # The listener's handler does the real formatting
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    level = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    # Configure this example's logger and the WebSocket client's rather than the
+    # root logger: the client installs its own synchronous StreamHandler unless
+    # its logger already has a handler, and would otherwise print twice
+    for logger in (log, logging.getLogger('broker_ws_client')):
+        logger.handlers[:] = [queue_handler]
+        logger.setLevel(level if isinstance(level, int) else logging.INFO)
+        logger.propagate = False
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
 
 
 async def balances_handler(message):
     """Handle balances updates"""
-    print(f"📊 Received balances update on channel '{message['ch']}'")
-    if 'data' in message:
-        print("Data:", json.dumps(message['data'], indent=2))
+    emit_record(message)
 
 
 async def order_handler(message):
     """Handle order updates"""
-    print(f"📦 Received order update")
-    if 'data' in message:
-        print("Order Data:", json.dumps(message['data'], indent=2))
+    emit_record(message)
 
 
 async def check_order_status_cyclically(ws_client, order_id, max_attempts=5):
@@ -49,21 +105,21 @@ async def check_order_status_cyclically(ws_client, order_id, max_attempts=5):
     
     while attempt < max_attempts:
         attempt += 1
-        print(f"\nAttempt {attempt}/{max_attempts} - Checking status for order {order_id}...")
+        log.info("Attempt %d/%d - Checking status for order %s...", attempt, max_attempts, order_id)
         
         try:
             await ws_client.get_order_status(order_id)
             
-            # Wait 2 seconds before next check
+            # Back off before next check
             if attempt < max_attempts:
-                await asyncio.sleep(2)
+                await asyncio.sleep(poll_delay(attempt))
                 
         except Exception as e:
-            print(f"Error checking order status: {e}")
+            log.error("Error checking order status: %s", e)
             if attempt < max_attempts:
-                await asyncio.sleep(2)
+                await asyncio.sleep(poll_delay(attempt, error=True))
     
-    print(f"\n⚠ Completed {max_attempts} status checks for order {order_id}")
+    log.info("⚠ Completed %d status checks for order %s", max_attempts, order_id)
 
 
 async def main():
@@ -82,13 +138,10 @@ async def main():
         return
 
     # Convert HTTP URL to WebSocket URL
-    ws_url = base_url.replace('https://', 'wss://').replace('http://', 'ws://') + '/ws/v1/stream'
+    ws_url = ws_url_from_base(base_url)
     
     print(f"Connecting to: {ws_url}")
 
-    # Create WebSocket client
-    ws_client = BrokerWSClient(api_key, secret_key, ws_url)
-    
     # Store created order ID for subscription
     created_order_id = None
     
@@ -98,40 +151,34 @@ async def main():
         op = message.get('op', '')
         
         if op == 'estimate':
-            print("💰 Estimate response received:")
-            print(json.dumps(message.get('data', {}), indent=2))
+            emit_record(message)
         elif op == 'balances':
-            print("💼 Balances response received:")
-            print(json.dumps(message.get('data', {}), indent=2))
+            emit_record(message)
         elif op == 'swap':
-            print("🔄 Swap response received:")
-            print(json.dumps(message.get('data', {}), indent=2))
+            emit_record(message)
             
             # Subscribe to the created order channel for real-time updates
             if message.get('data') and message['data'].get('orderId'):
                 created_order_id = message['data']['orderId']
                 order_channel = f"orders:{created_order_id}"
-                print(f"\n📡 Subscribing to order channel: {order_channel}")
+                log.info("📡 Subscribing to order channel: %s", order_channel)
                 
                 try:
                     async def order_update_handler(order_message):
-                        print(f"\n🔔 Real-time order update for {created_order_id}:")
-                        print(json.dumps(order_message.get('data', {}), indent=2))
+                        emit_record(order_message)
                     
-                    await ws_client.subscribe(order_channel, order_update_handler)
+                    await pooled_subscribe(ws_client, order_channel, order_update_handler)
                     
                     # Cyclically check order status (up to 5 attempts)
-                    print(f"\n📋 Checking order status for {created_order_id} (cyclical check)...")
-                    asyncio.create_task(check_order_status_cyclically(ws_client, created_order_id))
+                    log.info("📋 Checking order status for %s (cyclical check)...", created_order_id)
+                    task = asyncio.create_task(check_order_status_cyclically(ws_client, created_order_id))
+                    _bg.add(task)
+                    task.add_done_callback(_bg.discard)
                 except Exception as e:
-                    print(f"Failed to subscribe to order channel: {e}")
+                    log.error("Failed to subscribe to order channel: %s", e)
                     
         elif op == 'order_status':
-            print("📋 Order status response received:")
-            print(json.dumps(message.get('data', {}), indent=2))
-    
-    # Set response handler
-    ws_client.response_handler = response_handler
+            emit_record(message)
     
     # Setup graceful shutdown
     shutdown_event = asyncio.Event()
@@ -140,23 +187,36 @@ async def main():
         print("\n=== Shutting down ===")
         shutdown_event.set()
     
-    # Register signal handlers
+    # Register signal handlers with the event loop, so shutdown runs on the
+    # loop itself; add_signal_handler is not available on Windows
+    loop = asyncio.get_running_loop()
     for sig in [signal.SIGINT, signal.SIGTERM]:
-        signal.signal(sig, lambda s, f: signal_handler())
+        try:
+            loop.add_signal_handler(sig, signal_handler)
+        except NotImplementedError:
+            signal.signal(sig, lambda s, f: loop.call_soon_threadsafe(signal_handler))
+
+    # Handler output is buffered and flushed on a timer instead of per line
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    flush_task = asyncio.create_task(flush_stdout())
 
     try:
-        # Connect to WebSocket using context manager
+        # Connect using a pooled WebSocket client, closed with the pool
         print("=== Connecting to WebSocket ===")
-        async with ws_client:
+        async with ws_client_pool():
+            ws_client = await get_ws_client(api_key, secret_key, ws_url)
+            ws_client.response_handler = response_handler
+
             # Subscribe to balances channel
             print("\n=== Subscribing to balances channel ===")
-            await ws_client.subscribe('balances', balances_handler)
+            balances_client = await pooled_subscribe(ws_client, 'balances', balances_handler)
 
             # Subscribe to specific order channel (example)
             print("\n=== Subscribing to order updates (example) ===")
             order_id = 'ord_12345678'
             order_channel = f'orders:{order_id}'
-            await ws_client.subscribe(order_channel, order_handler)
+            order_client = await pooled_subscribe(ws_client, order_channel, order_handler)
 
             # Demo REST API commands via WebSocket
             print("\n=== Testing REST API commands via WebSocket ===")
@@ -197,18 +257,78 @@ async def main():
                 except asyncio.CancelledError:
                     pass
 
+            # Stop status checks still running in the background
+            for task in _bg:
+                task.cancel()
+            await asyncio.gather(*_bg, return_exceptions=True)
+
             # Cleanup subscriptions
             print("\nUnsubscribing from channels...")
-            try:
-                await ws_client.unsubscribe('balances')
-                await ws_client.unsubscribe(order_channel)
-            except Exception as e:
-                print(f"Error during unsubscribe: {e}")
+            results = await asyncio.gather(
+                balances_client.unsubscribe('balances'),
+                order_client.unsubscribe(order_channel),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Error during unsubscribe: {result}")
 
         print("WebSocket client stopped")
 
     except Exception as e:
         print(f"❌ WebSocket example failed: {e}")
+    finally:
+        flush_task.cancel()
+        sys.stdout.flush()
+
+
+async def stdin_lines(prompt):
+    """
+    Yield lines typed on stdin until EOF
+
+    A single stdin reader is registered with the event loop; where that is not
+    supported (Windows, stdin redirected from a file) lines are read in a
+    worker thread instead.
+    """
+    loop = asyncio.get_running_loop()
+    fd = sys.stdin.fileno()
+    lines = asyncio.Queue()
+    pending = bytearray()
+
+    def on_readable():
+        # Read raw bytes: sys.stdin.readline() would buffer every line that is
+        # available but return only the first, leaving the fd unreadable
+        data = os.read(fd, 4096)
+        if not data:
+            loop.remove_reader(fd)
+            if pending:
+                lines.put_nowait(pending.decode('utf-8', 'replace'))
+            lines.put_nowait('')  # EOF
+            return
+        pending.extend(data)
+        while (end := pending.find(b'\n')) >= 0:
+            lines.put_nowait(pending[:end + 1].decode('utf-8', 'replace'))
+            del pending[:end + 1]
+
+    try:
+        loop.add_reader(fd, on_readable)
+    except (NotImplementedError, OSError, ValueError):
+        lines = None
+    
+    try:
+        while True:
+            emit(prompt)
+            sys.stdout.flush()
+            if lines is not None:
+                line = await lines.get()
+            else:
+                line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            yield line
+    finally:
+        if lines is not None:
+            loop.remove_reader(fd)
 
 
 async def handle_user_input(ws_client):
@@ -218,13 +338,9 @@ async def handle_user_input(ws_client):
     print("  'u' + Enter - to test unsubscribe/resubscribe")
     print("  'q' + Enter - to quit")
     
-    loop = asyncio.get_event_loop()
-    
-    while True:
+    async for line in stdin_lines("\n> "):
         try:
-            # Read input from stdin in a non-blocking way
-            user_input = await loop.run_in_executor(None, input, "\n> ")
-            user_input = user_input.strip().lower()
+            user_input = line.strip().lower()
             
             if user_input == 'q':
                 break
@@ -232,9 +348,9 @@ async def handle_user_input(ws_client):
                 print("--- Manual balances subscription test ---")
                 try:
                     def manual_balances_handler(message):
-                        print("🔄 Manual subscription - Balances update:", message.get('data', {}))
+                        emit_record(message)
                     
-                    await ws_client.subscribe('balances', manual_balances_handler)
+                    await pooled_subscribe(ws_client, 'balances', manual_balances_handler)
                 except Exception as e:
                     print(f"Manual subscription failed: {e}")
                     
@@ -247,9 +363,9 @@ async def handle_user_input(ws_client):
                     await asyncio.sleep(3)
                     
                     def resubscribed_handler(message):
-                        print("🔄 Resubscribed - Balances update:", message.get('data', {}))
+                        emit_record(message)
                     
-                    await ws_client.subscribe('balances', resubscribed_handler)
+                    await pooled_subscribe(ws_client, 'balances', resubscribed_handler)
                 except Exception as e:
                     print(f"Unsubscribe test failed: {e}")
             else:
@@ -257,8 +373,6 @@ async def handle_user_input(ws_client):
                 
         except KeyboardInterrupt:
             break
-        except EOFError:
-            break
         except Exception as e:
             print(f"Input error: {e}")
             break